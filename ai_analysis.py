@@ -1,6 +1,8 @@
 import pandas as pd
+import numpy as np
 import random
 import time
+import json
 
 # --- MOCK VISION AI FUNCTION ---
 # NOTE: In a real-world scenario, this function would contain the API call
@@ -8,35 +10,172 @@ import time
 # Since we cannot make live API calls here, this function simulates the AI's output
 # by randomly assigning descriptive tags based on the ad's performance score.
 
+# Tag pools the mock AI draws from. The base tags are common to all creatives;
+# the pattern tags depend on the performance bucket of the creative.
+BASE_TAG_POOLS = {
+    'format': ['UGC-Style Video', 'Studio Shoot', 'Static Image', 'Carousel'],
+    'setting': ['Indoor Fashion Shot', 'Outdoor Lifestyle', 'Product Demo', 'Text Overlay Only'],
+    'dominant_color': ['Black/White', 'Vibrant Pink/Red', 'Muted Earth Tones', 'Cool Blue/Green'],
+}
+
+PATTERN_TAG_POOLS = {
+    # High-performing creative patterns (simulated)
+    'high': {
+        'hook': ['Strong Text Hook (5+ words)', 'Fast-paced editing', 'Direct-to-camera speaking'],
+        'emotion': ['Excitement/Urgency', 'Calm/Luxurious'],
+    },
+    # Low-performing creative patterns (simulated)
+    'low': {
+        'hook': ['Slow Intro/Weak Hook', 'Busy Background', 'No clear CTA'],
+        'emotion': ['Confused/Aesthetic Only', 'Boring/Neutral'],
+    },
+    # Average creative patterns
+    'mid': {
+        'hook': ['Standard Product Showcase', 'Medium-paced edit'],
+        'emotion': ['Informative', 'Pleasant'],
+    },
+}
+
+# Closed set of values each tag column can take (all pattern buckets combined),
+# used to store the tags as fixed-category Categoricals
+TAG_CATEGORIES = {
+    **BASE_TAG_POOLS,
+    'hook': [t for pools in PATTERN_TAG_POOLS.values() for t in pools['hook']],
+    'emotion': [t for pools in PATTERN_TAG_POOLS.values() for t in pools['emotion']],
+}
+
+# Set to an int for reproducible mock tags across reruns (None = fresh entropy)
+MOCK_AI_SEED = None
+_rng = np.random.default_rng(seed=MOCK_AI_SEED)
+
+def score_bucket(score):
+    """Maps a Creative Score to its performance bucket ('high', 'low' or 'mid')."""
+    if score >= 80:
+        return 'high'
+    elif score <= 30:
+        return 'low'
+    return 'mid'
+
 def mock_vision_ai_analysis(ad_name, creative_link, score):
-    """Simulates a Vision AI model analyzing a creative link and providing tags."""
+    """Simulates a Vision AI model analyzing a single creative link and providing tags.
+
+    Kept as a single-row debug helper; the batch run uses mock_vision_ai_batch.
+    """
     
     # 1. Base Descriptive Tags (Common to all creatives)
-    tags = {
-        'format': random.choice(['UGC-Style Video', 'Studio Shoot', 'Static Image', 'Carousel']),
-        'setting': random.choice(['Indoor Fashion Shot', 'Outdoor Lifestyle', 'Product Demo', 'Text Overlay Only']),
-        'dominant_color': random.choice(['Black/White', 'Vibrant Pink/Red', 'Muted Earth Tones', 'Cool Blue/Green'])
-    }
+    tags = {col: random.choice(pool) for col, pool in BASE_TAG_POOLS.items()}
     
     # 2. Performance-Based Pattern (Simulating AI finding a winning/losing pattern)
-    if score >= 80:
-        # High-performing creative patterns (simulated)
-        tags['hook'] = random.choice(['Strong Text Hook (5+ words)', 'Fast-paced editing', 'Direct-to-camera speaking'])
-        tags['emotion'] = random.choice(['Excitement/Urgency', 'Calm/Luxurious'])
-    elif score <= 30:
-        # Low-performing creative patterns (simulated)
-        tags['hook'] = random.choice(['Slow Intro/Weak Hook', 'Busy Background', 'No clear CTA'])
-        tags['emotion'] = random.choice(['Confused/Aesthetic Only', 'Boring/Neutral'])
-    else:
-        # Average creative patterns
-        tags['hook'] = random.choice(['Standard Product Showcase', 'Medium-paced edit'])
-        tags['emotion'] = random.choice(['Informative', 'Pleasant'])
+    for col, pool in PATTERN_TAG_POOLS[score_bucket(score)].items():
+        tags[col] = random.choice(pool)
 
     # The AI's full analysis output
     analysis_text = f"Analyzed {ad_name} (Score: {score:.1f}). Format: {tags['format']}. Hook: {tags['hook']}. Emotion: {tags['emotion']}. Link: {creative_link[:50]}..."
     
     return tags, analysis_text
 
+def mock_vision_ai_batch(scores, rng=None):
+    """Simulates the Vision AI tags for a whole batch of creatives at once.
+
+    Draws each tag column with a handful of vectorized numpy calls (one per
+    performance bucket) instead of one Python-level random.choice per row.
+    Uses the module-level generator unless a seeded `rng` is passed.
+    Returns a dict of tag column name -> object array aligned with scores.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    rng = _rng if rng is None else rng
+    n = len(scores)
+
+    hi = scores >= 80
+    lo = scores <= 30
+    masks = {'high': hi, 'low': lo, 'mid': ~(hi | lo)}
+
+    cols = {}
+    for col, pool in BASE_TAG_POOLS.items():
+        cols[col] = rng.choice(np.array(pool, dtype=object), size=n)
+
+    for col in ['hook', 'emotion']:
+        out = np.empty(n, dtype=object)
+        for bucket, mask in masks.items():
+            pool = np.array(PATTERN_TAG_POOLS[bucket][col], dtype=object)
+            out[mask] = rng.choice(pool, size=int(mask.sum()))
+        cols[col] = out
+
+    return cols
+
+def generate_hypotheses(df_final):
+    """Correlates the AI tags against the Creative Score and returns the hypothesis strings.
+
+    The strings keep the ✅/❌ markers and **bold** markdown used for terminal output.
+    """
+    hypotheses = []
+    tag_columns = ['format', 'setting', 'dominant_color', 'hook', 'emotion']
+    
+    scores = df_final['Creative_Score'].to_numpy(dtype=np.float64)
+    
+    for col in tag_columns:
+        # Each tag column is a small fixed-category Categorical, so aggregate
+        # with bincount over its integer codes instead of a hash groupby
+        codes = df_final[col].cat.codes.to_numpy()
+        labels = df_final[col].cat.categories
+        sums = np.bincount(codes, weights=scores, minlength=len(labels))
+        counts = np.bincount(codes, minlength=len(labels))
+        means = sums / np.maximum(counts, 1)
+        
+        # Filter for tags that appear at least 3 times for reliable analysis
+        reliable = np.flatnonzero(counts >= 3)
+        
+        if len(reliable) > 1:
+            best = reliable[np.argmax(means[reliable])]
+            worst = reliable[np.argmin(means[reliable])]
+            
+            # Calculate the performance difference
+            score_diff = (means[best] - means[worst]) / means[worst] * 100
+            
+            if score_diff > 10: # Only report significant difference (>10% better)
+                hypothesis = (
+                    f"✅ **WINNING HYPOTHESIS ({col.upper()}):** Creatives tagged as **'{labels[best]}'** "
+                    f"achieved an average Creative Score of **{means[best]:.1f}** (vs. {means[worst]:.1f}), "
+                    f"representing a **{score_diff:.0f}% higher performance** than the average."
+                )
+                hypotheses.append(hypothesis)
+            elif score_diff < -10:
+                 hypothesis = (
+                    f"❌ **LOSING HYPOTHESIS ({col.upper()}):** Creatives tagged as **'{labels[worst]}'** "
+                    f"achieved an average Creative Score of **{means[worst]:.1f}**, which is "
+                    f"**{abs(score_diff):.0f}% lower** than the better-performing tags."
+                )
+                 hypotheses.append(hypothesis)
+
+    return hypotheses
+
+def analyze_creatives(df):
+    """Tags the exported creatives with the mock Vision AI and derives the hypotheses.
+
+    Adds the tag columns to df in place, writes final_ai_creative_report.csv and
+    hypotheses.json, and returns the hypothesis strings. creative_pipeline.py
+    calls this on its fresh export so the dashboard never shows stale hypotheses.
+    """
+    # In a real API, the AI analyzes the URL from the 'creative_link' column.
+    # The mock draws all tags for the batch at once from the score buckets.
+    tag_cols = mock_vision_ai_batch(df['Creative_Score'].to_numpy())
+
+    # Attach the AI tags as new columns on the loaded data in place; the
+    # tagged frame is what gets grouped and exported as-is
+    for col, values in tag_cols.items():
+        df[col] = pd.Categorical(values, categories=TAG_CATEGORIES[col])
+
+    hypotheses = generate_hypotheses(df)
+
+    # Export the final data set including the AI tags
+    df.to_csv('final_ai_creative_report.csv', index=False)
+
+    # Standalone by-product of the script: nothing in the pipeline reads it back
+    with open('hypotheses.json', 'w', encoding='utf-8') as f:
+        json.dump(hypotheses, f, ensure_ascii=False, indent=2)
+
+    return hypotheses
+
 # ----------------------------------------------------------------------
 # 3. MAIN EXECUTION
 # ----------------------------------------------------------------------
@@ -49,64 +188,15 @@ if __name__ == '__main__':
 
         # --- A. RUN MOCK AI ANALYSIS ON ALL CREATIVES ---
         
-        results = []
         print("\n--- Running Mock Vision AI Analysis (This would take hours with a real API) ---")
-        
-        for index, row in df.iterrows():
-            # In a real API, the AI analyzes the URL from the 'creative_link' column
-            tags, analysis_text = mock_vision_ai_analysis(
-                row['ad_name'], 
-                row['creative_link'], 
-                row['Creative_Score']
-            )
-            
-            # Combine the AI's tags with the existing row data
-            row_data = row.to_dict()
-            row_data.update(tags)
-            results.append(row_data)
-            
-            # Print status update (Optional, shows progress)
-            # print(f"  [PROCESSED] {row['ad_name']} -> Format: {tags['format']}")
-        
-        # Convert the results back to a DataFrame
-        df_final = pd.DataFrame(results)
-        
+
         # --- B. CORRELATION AND HYPOTHESIS GENERATION ---
-        
+
         print("\n--- Generating Actionable Hypotheses from AI Tags ---")
         print("Comparing average Creative Score based on AI-generated tags:\n")
-        
-        hypotheses = []
-        tag_columns = ['format', 'setting', 'dominant_color', 'hook', 'emotion']
-        
-        for col in tag_columns:
-            # Group the data by the AI tag (e.g., 'UGC-Style Video')
-            tag_summary = df_final.groupby(col)['Creative_Score'].agg(['mean', 'count']).sort_values(by='mean', ascending=False)
-            
-            # Filter for tags that appear at least 3 times for reliable analysis
-            tag_summary = tag_summary[tag_summary['count'] >= 3] 
-            
-            if len(tag_summary) > 1:
-                best_tag = tag_summary.iloc[0]
-                worst_tag = tag_summary.iloc[-1]
-                
-                # Calculate the performance difference
-                score_diff = (best_tag['mean'] - worst_tag['mean']) / worst_tag['mean'] * 100
-                
-                if score_diff > 10: # Only report significant difference (>10% better)
-                    hypothesis = (
-                        f"✅ **WINNING HYPOTHESIS ({col.upper()}):** Creatives tagged as **'{tag_summary.index[0]}'** "
-                        f"achieved an average Creative Score of **{best_tag['mean']:.1f}** (vs. {worst_tag['mean']:.1f}), "
-                        f"representing a **{score_diff:.0f}% higher performance** than the average."
-                    )
-                    hypotheses.append(hypothesis)
-                elif score_diff < -10:
-                     hypothesis = (
-                        f"❌ **LOSING HYPOTHESIS ({col.upper()}):** Creatives tagged as **'{tag_summary.index[-1]}'** "
-                        f"achieved an average Creative Score of **{worst_tag['mean']:.1f}**, which is "
-                        f"**{abs(score_diff):.0f}% lower** than the better-performing tags."
-                    )
-                     hypotheses.append(hypothesis)
+
+        # Tags the creatives, exports the tagged report and returns the hypotheses
+        hypotheses = analyze_creatives(df)
 
         # --- C. FINAL OUTPUT AND EXPORT ---
         
@@ -122,10 +212,6 @@ if __name__ == '__main__':
             
         print("\n" + "="*70)
         print("Analysis complete. Check 'final_ai_creative_report.csv' for raw data.")
-        
-        # Export the final data set including the AI tags
-        df_final.to_csv('final_ai_creative_report.csv', index=False)
-
 
     except FileNotFoundError:
         print("\nERROR: ai_correlation_data.csv not found.")
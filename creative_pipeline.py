@@ -1,8 +1,28 @@
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import subprocess
+import argparse
 import os
+import glob
+import inspect
+import re
+import codecs
+import hashlib
+
+import ai_analysis
+
+try:
+    import pyarrow  # noqa: F401  (multithreaded read_csv engine and Parquet I/O)
+    CSV_ENGINE = 'pyarrow'
+    PARQUET_CACHE = True
+except ImportError:
+    CSV_ENGINE = 'c'
+    PARQUET_CACHE = False
+
+try:
+    from numba import njit, prange
+except ImportError:
+    # Numba is optional: without it scoring uses the pure NumPy expression
+    njit = None
 
 # ----------------------------------------------------------------------
 # 1. CONFIGURATION: COLUMN MAPPING & WEIGHTS
@@ -25,6 +45,23 @@ COLUMN_MAPPING = {
     'Video plays at 95%': 'Video_95_Percent',
 }
 
+# Raw metric columns parsed straight to float64 (float because Meta leaves blanks)
+RAW_METRIC_DTYPES = {
+    'Amount spent (AUD)': 'float64',
+    'Impressions': 'float64',
+    'Reach': 'float64',
+    'Frequency': 'float64',
+    'Clicks (all)': 'float64',
+    'Outbound clicks': 'float64',
+    'Purchases': 'float64',
+    'Purchase ROAS (return on ad spend)': 'float64',
+    'CTR (all)': 'float64',
+    'Video plays at 95%': 'float64',
+}
+
+# Catalogue/dynamic ads are excluded from creative ranking (case-insensitive literals)
+EXCLUDED_AD_SUBSTRINGS = ('DPA', 'Dynamic', 'Set - Sales')
+
 SCORE_WEIGHTS = {
     'CTR_Decimal': 0.40,
     'CVR_Decimal': 0.30,
@@ -32,132 +69,320 @@ SCORE_WEIGHTS = {
     'ThruPlay_Decimal': 0.10,
 }
 
+# The metrics are float32 (~7 significant digits), so exports are written at
+# that precision instead of showing float32 noise digits as float64
+EXPORT_FLOAT_FORMAT = '%.7g'
+
 # ----------------------------------------------------------------------
-# 2. DATA CLEANING FUNCTIONS (UNCHANGED)
+# 2. DATA CLEANING FUNCTIONS
 # ----------------------------------------------------------------------
 
+def detect_encoding(file_path, sample_size=65536):
+    """Sniffs the CSV encoding from a prefix: UTF-8 if the sample decodes, else cp1252 (Excel re-saves)."""
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_size)
+    try:
+        # Incremental decode so a multi-byte char cut at the sample boundary is not an error
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1252'
+
+def _clean_cache_path(file_path, mapping):
+    """Parquet cache path for the cleaned frame, keyed on everything that shapes it.
+
+    The hash covers the column mapping, the exclusion list, the parse dtypes,
+    the cleaning code itself and the pandas/pyarrow versions, so changing any
+    of them misses the old cache instead of returning a stale frame.
+    """
+    h = hashlib.blake2b(digest_size=8)
+    h.update(repr((
+        sorted(mapping.items()), EXCLUDED_AD_SUBSTRINGS, sorted(RAW_METRIC_DTYPES.items()),
+        pd.__version__, pyarrow.__version__,
+    )).encode('utf-8'))
+    h.update(inspect.getsource(load_and_clean_data).encode('utf-8'))
+    return f'{file_path}.{h.hexdigest()}.parquet'
+
+def _write_clean_cache(df, file_path, cache):
+    """Stores the cleaned frame at `cache`, replacing older caches of the same CSV."""
+    tmp_path = cache + '.tmp'
+    try:
+        for stale_path in glob.glob(glob.escape(file_path) + '.*.parquet'):
+            os.remove(stale_path)
+        # Written to a temp file and renamed into place, so a crash mid-write
+        # never leaves a truncated cache that looks newer than the CSV
+        df.to_parquet(tmp_path, compression='zstd', index=False)
+        os.replace(tmp_path, cache)
+    except (OSError, ValueError, TypeError):
+        # e.g. a read-only data directory: run without the cache
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
 def load_and_clean_data(file_path, mapping):
-    df = pd.read_csv(file_path)
+    # The cleaned frame is cached next to the CSV and reused until the CSV is
+    # newer than it (or the cleaning configuration changes, see _clean_cache_path)
+    cache = None
+    if PARQUET_CACHE:
+        try:
+            cache = _clean_cache_path(file_path, mapping)
+            if os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(file_path):
+                return pd.read_parquet(cache)
+        except (OSError, ValueError):
+            # An unreadable cache is skipped; it is rebuilt from the CSV below
+            pass
+
+    encoding = detect_encoding(file_path)
+    # Only parse the mapped columns (the export may not contain all of them),
+    # typing the metric columns directly in the parser. usecols is resolved from
+    # the header up front because the pyarrow engine does not accept a callable.
+    header = pd.read_csv(file_path, nrows=0, encoding=encoding).columns
+    read_kwargs = {'memory_map': True} if CSV_ENGINE == 'c' else {}
+    # The dtype map is keyed on the header's exact (possibly padded) names so
+    # it matches the same columns usecols selects after stripping
+    df = pd.read_csv(
+        file_path,
+        usecols=[col for col in header if col.strip() in mapping],
+        dtype={col: RAW_METRIC_DTYPES[col.strip()] for col in header if col.strip() in RAW_METRIC_DTYPES},
+        na_values=['', '-'],
+        encoding=encoding,
+        engine=CSV_ENGINE,
+        **read_kwargs,
+    )
     df.columns = df.columns.str.strip()
     df = df.rename(columns=mapping)
-    metric_cols = [
-        'Spend', 'impressions', 'Outbound_Clicks', 'Purchases', 
-        'ROAS_Purchase', 'Clicks_All', 'CTR_Raw'
-    ]
-    for col in metric_cols:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
     df.dropna(subset=['ad_name', 'ad_id', 'Spend'], inplace=True)
-    df = df[~df['ad_name'].str.contains('DPA|Dynamic|Set - Sales', na=False, case=False)]
+    # Lowercase once, then plain substring scans (no regex engine per cell)
+    names = df['ad_name'].str.lower()
+    excluded = np.zeros(len(df), dtype=bool)
+    for substring in EXCLUDED_AD_SUBSTRINGS:
+        excluded |= names.str.contains(substring.lower(), regex=False, na=False).to_numpy(dtype=bool)
+    df = df[~excluded]
+    # Metrics don't need float64 precision: float32 halves the bytes every later
+    # copy/sort touches. Only the metric columns are downcast; numeric IDs
+    # (ad_id, creative_id) are 18 digits and would collide as floats.
+    # Categorical ad names make the name de-dupe hash codes.
+    metric_cols = [mapping[col] for col in RAW_METRIC_DTYPES if col in mapping and mapping[col] in df.columns]
+    df[metric_cols] = df[metric_cols].apply(pd.to_numeric, downcast='float')
+    df['ad_name'] = df['ad_name'].astype('category')
+    if cache is not None:
+        # Parquet keeps the float32 and categorical dtypes, so a cached load needs no re-coercion
+        _write_clean_cache(df, file_path, cache)
     return df
 
 def calculate_derivatives(df):
-    df['CVR_Decimal'] = (df['Purchases'] / df['Outbound_Clicks']).replace([np.inf, -np.inf], 0).fillna(0)
-    df['CTR_Decimal'] = (df['CTR_Raw'] / 100).replace([np.inf, -np.inf], 0).fillna(0)
-    df['CPA'] = (df['Spend'] / df['Purchases']).replace([np.inf, -np.inf], 0).fillna(0)
-    df['ThruPlay_Decimal'] = (df['Video_95_Percent'] / df['impressions']).replace([np.inf, -np.inf], 0).fillna(0)
+    # Pull all six inputs in one pass (they share a single float32 block after load)
+    inputs = ['Purchases', 'Outbound_Clicks', 'CTR_Raw', 'Spend', 'Video_95_Percent', 'impressions']
+    pur, oc, ctr_raw, spend, v95, imp = df[inputs].to_numpy(dtype=np.float64).T
+
+    # Division by zero (or by/of a blank NaN) is suppressed at source via where=,
+    # so no inf/NaN is ever produced and no replace()/fillna() cleanup is needed.
+    # Those cells keep the 0 the zero-filled outputs start with, which is the
+    # sentinel the old replace([inf, -inf], 0).fillna(0) chains produced.
+    cvr = np.zeros(len(df))
+    ctr = np.zeros(len(df))
+    cpa = np.zeros(len(df))
+    thru = np.zeros(len(df))
+    np.divide(pur, oc, out=cvr, where=(oc > 0) & ~np.isnan(pur))
+    np.divide(ctr_raw, 100.0, out=ctr, where=~np.isnan(ctr_raw))
+    np.divide(spend, pur, out=cpa, where=(pur > 0) & ~np.isnan(spend))
+    np.divide(v95, imp, out=thru, where=(imp > 0) & ~np.isnan(v95))
+
+    df['CVR_Decimal'] = cvr
+    df['CTR_Decimal'] = ctr
+    df['CPA'] = cpa
+    df['ThruPlay_Decimal'] = thru
     return df
 
 def apply_quality_filters(df):
-    df = df[df['Spend'] >= 50]
-    df = df[df['impressions'] >= 1000]
-    df = df[df['Spend'] > 0]
-    df = df[df['Purchases'] > 0]
-    return df
+    # One combined mask and a single slice (Spend >= 50 already implies Spend > 0)
+    mask = (df['Spend'] >= 50) & (df['impressions'] >= 1000) & (df['Purchases'] > 0)
+    return df.loc[mask]
+
+def _column_ranges(X):
+    """Per-column min and span of an (N, M) metric matrix; constant columns get span 1 so they normalize to 0."""
+    mn = np.nanmin(X, axis=0)
+    mx = np.nanmax(X, axis=0)
+    span = np.where(mx > mn, mx - mn, 1.0)
+    return mn, span
+
+def _rescale_to_100(out):
+    m = np.nanmax(out)
+    if m > 0:
+        out *= 100.0 / m
+    return out
+
+def _score_numpy(X, w):
+    """Min-max normalize + weighted sum over an (N, M) metric matrix as one NumPy expression, scaled to 0-100."""
+    mn, span = _column_ranges(X)
+    return _rescale_to_100(((X - mn) / span) @ w)
+
+if njit is not None:
+    # Lazily specialized (no eager signature) so read-only views from pandas
+    # copy-on-write and any memory layout are accepted
+    @njit(cache=True, parallel=True, fastmath=True)
+    def _score_rows(X, w, mn, span):
+        """Fused normalize + weighted sum per row, parallel over rows (no (X - mn) / span temporary)."""
+        n = X.shape[0]
+        out = np.empty(n)
+        for i in prange(n):
+            s = 0.0
+            for k in range(X.shape[1]):
+                s += (X[i, k] - mn[k]) / span[k] * w[k]
+            out[i] = s
+        return out
+
+    def _score_kernel(X, w):
+        """Numba-compiled equivalent of _score_numpy; the tiny min/span reductions stay in NumPy."""
+        mn, span = _column_ranges(X)
+        return _rescale_to_100(_score_rows(X, w, mn, span))
+else:
+    _score_kernel = _score_numpy
 
 def calculate_creative_score(df, weights):
-    df_score = df.copy()
-    metrics = list(weights.keys())
-    for metric in metrics:
-        col_name_norm = f'{metric}_norm'
-        max_val = df_score[metric].max()
-        min_val = df_score[metric].min()
-        if max_val == min_val:
-            df_score[col_name_norm] = 0
-        else:
-            df_score[col_name_norm] = (df_score[metric] - min_val) / (max_val - min_val)
+    """Weighted composite of rank-normalized metrics, scaled to 0-100.
 
-    df_score['Creative_Score'] = 0
-    for metric, weight in weights.items():
-        col_name_norm = f'{metric}_norm'
-        df_score['Creative_Score'] += df_score[col_name_norm] * weight
-        
-    max_composite = df_score['Creative_Score'].max()
-    df_score['Creative_Score'] = (df_score['Creative_Score'] / max_composite) * 100
-    return df_score.sort_values(by='Creative_Score', ascending=False)
+    Each metric is replaced by its rank within the column (ties share the
+    average rank) before the min-max scaling in the kernel, so every metric is
+    spread evenly over [0, 1] and a single outlier ad cannot pin the scale.
+    A blank metric (e.g. no ROAS reported) ranks worst within its column, so
+    the ad is still scored on its other metrics instead of getting NaN.
+    """
+    metrics = list(weights.keys())
+    # Higher ranks score better, so na_option='top' (lowest rank) means worst
+    X = df[metrics].rank(method='average', na_option='top').to_numpy(dtype=np.float64)
+    w = np.array([weights[m] for m in metrics], dtype=np.float64)
+    if X.shape[0] == 0:
+        # No ad passed the quality filters; the min/max reductions need at least one row
+        score = np.empty(0)
+    else:
+        score = _score_kernel(X, w)
+    # Only Creative_Score is used downstream, so attach it without copying the frame.
+    # Left unsorted: callers take the top/bottom rows with nlargest/nsmallest.
+    return df.assign(Creative_Score=score)
 
 # ----------------------------------------------------------------------
 # 3. HELPER FUNCTIONS FOR HTML
 # ----------------------------------------------------------------------
 
 def process_table_data(df):
-    """Formats data and creates the clickable link column."""
-    df_dash = df.copy()
-    df_dash['Creative Score (0-100)'] = df_dash['Creative_Score'].round(2)
-    df_dash['CPA ($)'] = df_dash['CPA'].round(2)
-    df_dash['ROAS'] = df_dash['ROAS_Purchase'].round(2)
-    df_dash['CTR (%)'] = (df_dash['CTR_Decimal'] * 100).round(2)
-    df_dash['CVR (%)'] = (df_dash['CVR_Decimal'] * 100).round(2)
-
-    # NEW: Create the clickable link column (HTML Link)
-    def make_clickable_ad_name(row):
-        # We use 'Ad Name (Click to View)' as the table header now
-        return f'<a href="{row["creative_link"]}" target="_blank">{row["ad_name"]}</a>'
-    
-    # Apply the function to create the new column
-    df_dash['Ad Name (Click to View)'] = df_dash.apply(make_clickable_ad_name, axis=1)
+    """Formats data and creates the clickable link column.
+
+    Builds a compact display-only frame holding just the columns the charts and
+    tables use, already rounded to 2 decimals (stored as float32), rather than
+    copying the full frame.
+    """
+    df_dash = pd.DataFrame({
+        'ad_name': df['ad_name'],
+        'creative_link': df['creative_link'],
+        'Creative Score (0-100)': df['Creative_Score'].round(2),
+        'Spend': df['Spend'].round(2),
+        'CPA ($)': df['CPA'].round(2),
+        'ROAS': df['ROAS_Purchase'].round(2),
+        'CTR (%)': (df['CTR_Decimal'] * 100).round(2),
+        'CVR (%)': (df['CVR_Decimal'] * 100).round(2),
+    })
+    # float32 halves the binary-encoded trace data Plotly embeds for the charts;
+    # tables and hovers format back to 2 decimals
+    metric_cols = ['Creative Score (0-100)', 'Spend', 'CPA ($)', 'ROAS', 'CTR (%)', 'CVR (%)']
+    df_dash[metric_cols] = df_dash[metric_cols].astype(np.float32)
+
+    # NEW: Create the clickable link column (HTML Link), built with vectorized
+    # string concatenation. We use 'Ad Name (Click to View)' as the table header now
+    df_dash['Ad Name (Click to View)'] = (
+        '<a href="' + df_dash['creative_link'].astype(str) + '" target="_blank">'
+        + df_dash['ad_name'].astype(str) + '</a>'
+    )
 
     return df_dash
 
-def get_ai_hypotheses():
-    """Reads the final hypotheses from the ai_analysis.py script output."""
+TABLE_COLUMNS = ['Ad Name (Click to View)', 'Creative Score (0-100)', 'Spend', 'ROAS', 'CPA ($)', 'CTR (%)', 'CVR (%)']
+
+def render_table(df_dash, classes):
+    """Renders dashboard rows as an HTML table with the clickable ad-name column."""
+    # Values are pre-rounded in process_table_data; a format string (not a
+    # lambda) keeps the 2-decimal display without a Python call per cell
+    return df_dash.to_html(
+        columns=TABLE_COLUMNS,
+        index=False,
+        float_format='%.2f',
+        classes=classes,
+        escape=False # CRITICAL: Allows the HTML link to be rendered
+    )
+
+def cached_chart_html(name, df_dash, div_id, scatter_kwargs, layout_kwargs, cache_dir='.cache'):
+    """Returns the scatter chart <div>, reusing the cached HTML when the chart inputs are unchanged.
+
+    The cache key hashes the plotted columns together with the chart settings, the
+    Plotly version and this function's own source, so any change to the data, the
+    chart definition or the rendering code below rebuilds it.
+    Hover values of the x/y/size/color columns are shown with 2 decimals.
+    """
+    # Plotly is imported on first use so --no-dashboard runs never load it
+    import plotly.express as px
+    from plotly.offline import get_plotlyjs_version
+
+    plotted_cols = [scatter_kwargs[k] for k in ('x', 'y', 'size', 'color', 'hover_name') if k in scatter_kwargs]
+    h = hashlib.blake2b(digest_size=8)
+    h.update(pd.util.hash_pandas_object(df_dash[plotted_cols], index=False).to_numpy().tobytes())
+    h.update(repr((div_id, sorted(scatter_kwargs.items()), sorted(layout_kwargs.items()), get_plotlyjs_version())).encode('utf-8'))
+    h.update(inspect.getsource(cached_chart_html).encode('utf-8'))
+    cache_path = os.path.join(cache_dir, f'{name}_{h.hexdigest()}.html')
+
+    if os.path.exists(cache_path):
+        with open(cache_path, encoding='utf-8') as f:
+            return f.read()
+
+    # Format the numeric hover values to 2 decimals in the browser (the data is float32)
+    hover_formats = {scatter_kwargs[k]: ':.2f' for k in ('x', 'y', 'size', 'color') if k in scatter_kwargs}
+    fig = px.scatter(df_dash, hover_data=hover_formats, **scatter_kwargs)
+    fig.update_layout(**layout_kwargs)
+    chart_html = fig.to_html(full_html=False, include_plotlyjs=False, div_id=div_id)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    # Only the entry for the current data is kept per chart
+    for stale_path in glob.glob(os.path.join(cache_dir, f'{name}_*.html')):
+        os.remove(stale_path)
+    # Written to a temp file and renamed into place, so an interrupted run never
+    # leaves a truncated <div> behind for later dashboards to reuse
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(chart_html)
+    os.replace(tmp_path, cache_path)
+    return chart_html
+
+def get_ai_hypotheses(export_path='ai_correlation_data.csv'):
+    """Runs the AI analysis on this run's export and formats its hypotheses as HTML."""
     
-    # --- IMPORTANT NOTE ON SUBPROCESS ---
-    # Because we cannot reliably run a separate Python script ('ai_analysis.py') 
-    # and capture its output (the hypotheses) across all user environments (like VS Code), 
-    # we must rely on the user running the script first. The code below simulates 
-    # capturing the output, but the user must ensure ai_analysis.py ran successfully.
+    # The analysis runs in-process on the export file just written, read back
+    # exactly as ai_analysis.py would, so the hypotheses always match the
+    # tables. It also refreshes final_ai_creative_report.csv and hypotheses.json.
     
-    if os.path.exists('final_ai_creative_report.csv'):
-        try:
-            # Execute the script and capture its standard output (the print statements)
-            # This is complex and often fails in certain environments.
-            result = subprocess.run(['python3', 'ai_analysis.py'], capture_output=True, text=True, check=True)
-            output = result.stdout
-            
-            start_tag = "FINAL ACTIONABLE CREATIVE HYPOTHESES"
-            end_tag = "Analysis complete."
+    try:
+        hypotheses = ai_analysis.analyze_creatives(pd.read_csv(export_path))
+        
+        if not hypotheses:
+            hypotheses = ['No significant performance differences (over 10%) found between AI tags.']
+        
+        # Format the hypotheses for clean HTML display
+        hypotheses_html = ""
+        for line in hypotheses:
+            # Remove the emoji markers for a clean, professional look
+            line = line.replace('✅', '').replace('❌', '').strip()
             
-            if start_tag in output:
-                start_index = output.find(start_tag)
-                # Find the end of the hypothesis block
-                end_index = output.find(end_tag, start_index)
-                
-                hypotheses_raw = output[start_index:end_index].strip()
-                
-                # Split and format the hypotheses for clean HTML display
-                hypotheses_html = ""
-                for line in hypotheses_raw.split('\n'):
-                    # Skip the separator lines
-                    if line.startswith('='): continue
-                    
-                    # Remove the emoji markers from the captured output for a clean, professional look
-                    line = line.replace('✅', '').replace('❌', '').strip()
-                    
-                    if line:
-                        # Convert **text** to <strong>text</strong> for bolding
-                        line = line.replace('**', '<strong>').replace('</strong>', '</strong>')
-                        hypotheses_html += f'<p class="lead" style="font-size:1.1rem;">{line}</p>'
-                
-                if hypotheses_html:
-                    return hypotheses_html
-        except Exception:
-            # If the script fails to run, show a friendly warning.
-            pass
+            # Convert **text** to <strong>text</strong> for bolding
+            line = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', line)
+            hypotheses_html += f'<p class="lead" style="font-size:1.1rem;">{line}</p>'
+        
+        return hypotheses_html
+    except Exception:
+        # Any failure in the analysis degrades to the warning below, as the old
+        # subprocess run did, so the rest of the dashboard is still written.
+        pass
             
     return (
         '<div class="alert alert-warning" role="alert">'
-        '<strong>AI Hypotheses Not Available:</strong> Please ensure you have run the '
-        '<strong>`python3 ai_analysis.py`</strong> script once in your terminal to generate the final strategic report.'
+        '<strong>AI Hypotheses Not Available:</strong> The AI analysis of this run\'s export failed. Run '
+        '<strong>`python3 ai_analysis.py`</strong> in your terminal to see the error.'
         '</div>'
     )
 
@@ -167,59 +392,77 @@ def get_ai_hypotheses():
 # ----------------------------------------------------------------------
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scores the Meta ad creatives and builds the performance dashboard.')
+    parser.add_argument(
+        '--no-dashboard', action='store_true',
+        help="only score the creatives and write ai_correlation_data.csv (skips Plotly and dashboard.html)",
+    )
+    args = parser.parse_args()
+
     try:
         # 1. Pipeline Execution
         df_cleaned = load_and_clean_data('raw_creative_data.csv', COLUMN_MAPPING)
-        df_derived = calculate_derivatives(df_cleaned)
-        df_filtered = apply_quality_filters(df_derived)
-        df_scored = calculate_creative_score(df_filtered, SCORE_WEIGHTS)
+        # The quality filters only read raw columns, so slice once up front and
+        # compute the derived rates on the smaller frame
+        df_filtered = apply_quality_filters(df_cleaned)
+        df_derived = calculate_derivatives(df_filtered)
+        df_scored = calculate_creative_score(df_derived, SCORE_WEIGHTS)
         
-        composite_top = df_scored.head(20)
-        composite_bottom = df_scored.tail(20)
+        # Partial selection instead of a full sort. nsmallest returns worst-first,
+        # so it is flipped to keep both slices in best-to-worst order.
+        top_20 = df_scored.nlargest(20, 'Creative_Score')
+        bottom_20 = df_scored.nsmallest(20, 'Creative_Score').iloc[::-1]
 
-        # Export for AI (including the link)
-        ai_data_to_export = pd.concat([composite_top, composite_bottom]).drop_duplicates(subset=['ad_name'])
+        # Export for AI (including the link). The integer index union takes rows in
+        # both slices (small datasets) once; the <= 40 rows are then put back in
+        # score order. Distinct ads can share an ad name, so names are still
+        # de-duplicated to keep the best-scoring row per creative name.
+        export_idx = np.union1d(top_20.index.to_numpy(), bottom_20.index.to_numpy())
+        ai_data_to_export = (
+            df_scored.loc[export_idx]
+            .sort_values(by='Creative_Score', ascending=False)
+            .drop_duplicates(subset=['ad_name'])
+        )
         export_columns = [
             'ad_name', 'Creative_Score', 'Spend', 'impressions', 'frequency',
             'CTR_Decimal', 'Outbound_Clicks', 'CPA', 'ROAS_Purchase', 'CVR_Decimal', 
             'ThruPlay_Decimal', 'creative_link'
         ]
-        ai_data_to_export[export_columns].to_csv('ai_correlation_data.csv', index=False)
+        ai_data_to_export.to_csv('ai_correlation_data.csv', index=False, columns=export_columns, float_format=EXPORT_FLOAT_FORMAT)
 
-        # 2. Prepare Dashboard Data & Charts
-        df_dash = process_table_data(df_scored)
-        hypotheses_html = get_ai_hypotheses() # Get the AI rules
+        if not args.no_dashboard:
+            # Plotly is only needed for the dashboard, so it is imported here
+            import plotly.express as px
+            from plotly.offline import get_plotlyjs_version
 
-        # 3. Chart Generation 
-        fig_efficiency = px.scatter(df_dash, x='CPA ($)', y='ROAS', size='Spend', color='Creative Score (0-100)', hover_name='Ad Name (Click to View)', color_continuous_scale=px.colors.sequential.Inferno, title='1. Creative Efficiency: ROAS vs. CPA (Bubble size = Spend)')
-        fig_efficiency.update_layout(xaxis_title="Cost Per Acquisition (AUD)", yaxis_title="Return On Ad Spend (ROAS)")
-        efficiency_div = fig_efficiency.to_html(full_html=False, include_plotlyjs='cdn', div_id="efficiency_chart_div")
+            # 2. Prepare Dashboard Data & Charts
+            df_dash = process_table_data(df_scored)
+            hypotheses_html = get_ai_hypotheses() # Get the AI rules
 
-        fig_acquisition = px.scatter(df_dash, x='CTR (%)', y='CVR (%)', size='Spend', color='Creative Score (0-100)', hover_name='Ad Name (Click to View)', color_continuous_scale=px.colors.sequential.Viridis, title='2. Creative Acquisition: CTR vs. CVR (Bubble size = Spend)')
-        fig_acquisition.update_layout(xaxis_title="Click-Through Rate (%)", yaxis_title="Conversion Rate (%)")
-        acquisition_div = fig_acquisition.to_html(full_html=False, include_plotlyjs='cdn', div_id="acquisition_chart_div")
+            # 3. Chart Generation (cached in .cache/ while the plotted data is unchanged)
+            efficiency_div = cached_chart_html(
+                'efficiency', df_dash, div_id="efficiency_chart_div",
+                scatter_kwargs=dict(x='CPA ($)', y='ROAS', size='Spend', color='Creative Score (0-100)', hover_name='Ad Name (Click to View)', color_continuous_scale=px.colors.sequential.Inferno, title='1. Creative Efficiency: ROAS vs. CPA (Bubble size = Spend)'),
+                layout_kwargs=dict(xaxis_title="Cost Per Acquisition (AUD)", yaxis_title="Return On Ad Spend (ROAS)"),
+            )
 
-        # 4. Table Generation (Using the new clickable column)
-        table_cols = ['Ad Name (Click to View)', 'Creative Score (0-100)', 'Spend', 'ROAS', 'CPA ($)', 'CTR (%)', 'CVR (%)']
-        
-        top_10_table = df_dash.head(10)[table_cols].to_html(
-            index=False, 
-            float_format=lambda x: f'{x:.2f}',
-            classes=['table', 'table-striped', 'table-hover'],
-            escape=False # CRITICAL: Allows the HTML link to be rendered
-        )
-        
-        bottom_10_table = df_dash.tail(10)[table_cols].to_html(
-            index=False, 
-            float_format=lambda x: f'{x:.2f}',
-            classes=['table', 'table-striped', 'table-hover table-danger'],
-            escape=False # CRITICAL: Allows the HTML link to be rendered
-        )
+            acquisition_div = cached_chart_html(
+                'acquisition', df_dash, div_id="acquisition_chart_div",
+                scatter_kwargs=dict(x='CTR (%)', y='CVR (%)', size='Spend', color='Creative Score (0-100)', hover_name='Ad Name (Click to View)', color_continuous_scale=px.colors.sequential.Viridis, title='2. Creative Acquisition: CTR vs. CVR (Bubble size = Spend)'),
+                layout_kwargs=dict(xaxis_title="Click-Through Rate (%)", yaxis_title="Conversion Rate (%)"),
+            )
 
+            # 4. Table Generation (Using the new clickable column)
+            top_10_table = render_table(df_dash.loc[top_20.index[:10]], ['table', 'table-striped', 'table-hover'])
+            bottom_10_table = render_table(df_dash.loc[bottom_20.index[-10:]], ['table', 'table-striped', 'table-hover table-danger'])
 
-        # --- 5. GENERATE FINAL HTML DASHBOARD FILE ---
+
+            # --- 5. GENERATE FINAL HTML DASHBOARD FILE ---
         
-        html_template = f"""
+            # The scaffold is split around the four large generated fragments (tables
+            # and charts), which are streamed to the file in order instead of being
+            # interpolated into one big intermediate string.
+            html_header = f"""
 <!DOCTYPE html>
 <html>
 <head>
@@ -227,7 +470,7 @@ if __name__ == '__main__':
     <meta charset="utf-8">
     <meta name="viewport" content="width=device-width, initial-scale=1">
     <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.min.css">
-    <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
+    <script src="https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"></script>
     <style>
         .container-fluid {{ max-width: 1400px; }} 
         .plotly-graph-div {{ height: 500px !important; }}
@@ -252,7 +495,9 @@ if __name__ == '__main__':
             <div class="col-12">
                 <h2>Top 10 Creatives (Ranked by Composite Score)</h2>
                 <p class="text-muted">The Creative Score is a composite index (0-100) combining efficiency (ROAS) and acquisition (CTR, CVR) metrics. Click the **Ad Name** to view the creative.</p>
-                {top_10_table}
+                """
+
+            html_mid_tables = """
             </div>
         </div>
         
@@ -260,7 +505,9 @@ if __name__ == '__main__':
             <div class="col-12">
                 <h2 class="text-danger">Bottom 10 Creatives (Identify What to Pause)</h2>
                 <p class="text-muted">These creatives have the lowest Composite Scores. Analyzing these against the Top 10 provides the greatest insight for the AI phase. Click the **Ad Name** to view the creative.</p>
-                {bottom_10_table}
+                """
+
+            html_mid_charts = f"""
             </div>
         </div>
         
@@ -278,10 +525,14 @@ if __name__ == '__main__':
 
         <div class="row">
             <div class="col-lg-6">
-                {efficiency_div}
+                """
+
+            html_mid_chart_cols = """
             </div>
             <div class="col-lg-6">
-                {acquisition_div}
+                """
+
+            html_footer = """
             </div>
         </div>
 
@@ -293,13 +544,28 @@ if __name__ == '__main__':
 </html>
 """
 
-        with open('dashboard.html', 'w') as f:
-            f.write(html_template)
+            html_parts = [
+                html_header, top_10_table,
+                html_mid_tables, bottom_10_table,
+                html_mid_charts, efficiency_div,
+                html_mid_chart_cols, acquisition_div,
+                html_footer,
+            ]
+
+            # 1 MiB block-buffered binary write, encoded as the UTF-8 the page declares
+            with open('dashboard.html', 'wb', buffering=1 << 20) as f:
+                for part in html_parts:
+                    f.write(part.encode('utf-8'))
         
         print("\n--- SCRIPT COMPLETE ---")
-        print("1. Dashboard 'dashboard.html' updated (Professional view, Clickable Links, AI Hypotheses).")
+        if args.no_dashboard:
+            print("1. Dashboard skipped (--no-dashboard); 'dashboard.html' was not rebuilt.")
+        else:
+            print("1. Dashboard 'dashboard.html' updated (Professional view, Clickable Links, AI Hypotheses).")
         print("2. Data saved to 'ai_correlation_data.csv'.")
-        print("3. Final AI tags and links are in 'final_ai_creative_report.csv'.")
+        if not args.no_dashboard:
+            # The AI analysis only runs as part of the dashboard build
+            print("3. Final AI tags and links are in 'final_ai_creative_report.csv'.")
 
     except FileNotFoundError:
         print("\nERROR: raw_creative_data.csv not found. Please ensure the file is in the same directory.")